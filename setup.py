@@ -28,6 +28,11 @@ setup(
     ],
     python_requires=">=3.9",
     install_requires=requirements,
+    extras_require={
+        "numba": ["numba>=0.56.0"],
+        "polars": ["polars>=0.20.0"],
+        "cache": ["pyarrow>=7.0.0"],
+    },
     entry_points={
         "console_scripts": [
             "portfolio-backtester=src.main:main",
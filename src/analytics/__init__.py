@@ -4,6 +4,6 @@ Performance Analytics Module
 Tools for calculating portfolio performance metrics and risk measures.
 """
 
-from .performance_analyzer import PerformanceAnalyzer
+from .performance_analyzer import ENGINES, PerformanceAnalyzer, ReturnStats
 
-__all__ = ["PerformanceAnalyzer"] 
\ No newline at end of file
+__all__ = ["ENGINES", "PerformanceAnalyzer", "ReturnStats"] 
\ No newline at end of file
@@ -4,10 +4,89 @@ Performance Analyzer
 Calculates various performance metrics and risk measures for portfolios.
 """
 
+import importlib.util
+import math
 import pandas as pd
 import numpy as np
-from typing import Dict, Any
+from typing import Dict, Any, NamedTuple, Optional
 from src.utils.results import BacktestResults
+from src.utils.numba_utils import NUMBA_AVAILABLE, njit
+
+
+# Annualization constants, assuming 252 trading days per year
+_ANNUAL = 252.0
+_SQRT_252 = math.sqrt(_ANNUAL)
+
+# Backends for computing return statistics
+ENGINES = ("numpy", "numba", "polars")
+
+# Polars is imported lazily, only when its engine actually runs
+_POLARS_AVAILABLE = importlib.util.find_spec("polars") is not None
+
+
+class ReturnStats(NamedTuple):
+    """
+    Single-pass summary statistics of a portfolio return series.
+    
+    Moments are kept in Welford form (running mean and sum of squared
+    deviations) so they can be accumulated inside the backtest loop.
+    """
+    
+    count: int
+    mean: float
+    m2: float
+    neg_count: int
+    neg_mean: float
+    neg_m2: float
+    max_drawdown: float
+    
+    @property
+    def std(self) -> float:
+        """Sample standard deviation of all returns."""
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(self.m2 / (self.count - 1))
+    
+    @property
+    def downside_std(self) -> float:
+        """Sample standard deviation of the negative returns."""
+        if self.neg_count < 2:
+            return 0.0
+        return math.sqrt(self.neg_m2 / (self.neg_count - 1))
+
+
+@njit(cache=True)
+def _return_stats_jit(returns: np.ndarray) -> ReturnStats:
+    """Accumulate ReturnStats over a return series in a single compiled pass."""
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+    neg_count = 0
+    neg_mean = 0.0
+    neg_m2 = 0.0
+    
+    # The running peak starts at the first wealth value, not at 1, as in
+    # the numpy and polars engines
+    wealth = 1.0
+    peak = 0.0
+    max_dd = 0.0
+    
+    for r in returns:
+        count += 1
+        delta = r - mean
+        mean += delta / count
+        m2 += delta * (r - mean)
+        if r < 0.0:
+            neg_count += 1
+            delta = r - neg_mean
+            neg_mean += delta / neg_count
+            neg_m2 += delta * (r - neg_mean)
+        
+        wealth *= 1.0 + r
+        peak = max(peak, wealth)
+        max_dd = max(max_dd, (peak - wealth) / peak)
+    
+    return ReturnStats(count, mean, m2, neg_count, neg_mean, neg_m2, max_dd)
 
 
 class PerformanceAnalyzer:
@@ -18,60 +97,87 @@ class PerformanceAnalyzer:
     including returns, risk measures, and ratios.
     """
     
-    def __init__(self, risk_free_rate: float = 0.02):
+    def __init__(self, risk_free_rate: float = 0.02, engine: str = "numpy"):
         """
         Initialize the performance analyzer.
         
         Args:
             risk_free_rate: Annual risk-free rate (default: 2%)
+            engine: Backend for return statistics ('numpy', 'numba' or 'polars')
         """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}")
+        if engine == "numba" and not NUMBA_AVAILABLE:
+            raise ImportError("The 'numba' engine requires numba: pip install numba")
+        if engine == "polars" and not _POLARS_AVAILABLE:
+            raise ImportError("The 'polars' engine requires polars: pip install polars")
+        
         self.risk_free_rate = risk_free_rate
+        self.engine = engine
     
     def calculate_metrics(
         self,
         portfolio_values: pd.Series,
         weights: pd.DataFrame,
-        initial_capital: float
+        initial_capital: float,
+        returns: Optional[np.ndarray] = None,
+        stats: Optional[ReturnStats] = None
     ) -> BacktestResults:
         """
         Calculate comprehensive performance metrics.
         
         Args:
             portfolio_values: Series with portfolio values over time
+                (pandas or polars)
             weights: DataFrame with portfolio weights over time
+                (pandas or polars)
             initial_capital: Initial portfolio value
+            returns: Periodic portfolio returns already computed by the
+                backtest; derived from portfolio_values when omitted
+            stats: Return statistics already accumulated by the backtest
+                loop; computed from the returns when omitted
             
         Returns:
             BacktestResults object with all calculated metrics
         """
+        # Work on the underlying array, whichever frame library holds it
+        values = np.asarray(portfolio_values)
+        
         # Calculate basic metrics
-        final_value = portfolio_values.iloc[-1]
+        final_value = float(values[-1])
         total_return = (final_value - initial_capital) / initial_capital
         
-        # Calculate returns
-        returns = portfolio_values.pct_change().fillna(0)
+        # Calculate returns, with the first period flat
+        if returns is None:
+            values = values.astype(np.float64, copy=False)
+            returns = np.empty_like(values)
+            returns[0] = 0.0
+            returns[1:] = values[1:] / values[:-1] - 1
+        
+        if stats is None:
+            stats = self._calculate_return_stats(returns)
         
         # Calculate annualized metrics
-        days = len(portfolio_values)
-        years = days / 252  # Assuming 252 trading days per year
+        days = len(values)
+        years = days / _ANNUAL
         
         annualized_return = (1 + total_return) ** (1 / years) - 1
-        volatility = returns.std() * np.sqrt(252)
+        volatility = stats.std * _SQRT_252
         
         # Calculate risk-adjusted metrics
-        excess_returns = returns - self.risk_free_rate / 252
-        sharpe_ratio = self._calculate_sharpe_ratio(excess_returns)
-        sortino_ratio = self._calculate_sortino_ratio(returns)
+        sharpe_ratio = self._calculate_sharpe_ratio(stats.mean, stats.std)
+        sortino_ratio = self._calculate_sortino_ratio(stats.mean, stats.downside_std)
         
         # Calculate drawdown
-        max_drawdown = self._calculate_max_drawdown(portfolio_values)
+        max_drawdown = stats.max_drawdown
         
         # Calculate additional metrics
         calmar_ratio = self._calculate_calmar_ratio(annualized_return, max_drawdown)
         var_95 = self._calculate_var(returns, 0.05)
         
         # Get final weights
-        final_weights = weights.iloc[-1].to_dict()
+        last_weights = weights.tail(1).to_numpy()[0]
+        final_weights = {symbol: float(weight) for symbol, weight in zip(weights.columns, last_weights)}
         
         # Create results object
         results = BacktestResults(
@@ -89,66 +195,124 @@ class PerformanceAnalyzer:
         
         return results
     
-    def _calculate_sharpe_ratio(self, excess_returns: pd.Series) -> float:
+    def _calculate_return_stats(self, returns: np.ndarray) -> ReturnStats:
+        """
+        Calculate return statistics when the backtest loop did not supply them.
+        
+        Args:
+            returns: Array with returns
+            
+        Returns:
+            ReturnStats for the return series
+        """
+        if self.engine == "numba":
+            return _return_stats_jit(returns)
+        if self.engine == "polars":
+            return self._calculate_return_stats_polars(returns)
+        
+        downside = returns[returns < 0]
+        
+        mean = returns.mean()
+        neg_mean = downside.mean() if downside.size else 0.0
+        
+        return ReturnStats(
+            count=returns.size,
+            mean=mean,
+            m2=np.square(returns - mean).sum(),
+            neg_count=downside.size,
+            neg_mean=neg_mean,
+            neg_m2=np.square(downside - neg_mean).sum(),
+            max_drawdown=self._calculate_max_drawdown(returns)
+        )
+    
+    def _calculate_return_stats_polars(self, returns: np.ndarray) -> ReturnStats:
+        """
+        Calculate return statistics with polars.
+        
+        Args:
+            returns: Array with returns
+            
+        Returns:
+            ReturnStats for the return series
+        """
+        import polars as pl
+        
+        series = pl.Series(returns)
+        downside = series.filter(series < 0)
+        
+        mean = series.mean()
+        neg_mean = downside.mean() if downside.len() else 0.0
+        
+        cumulative = (series + 1).cum_prod()
+        running_max = cumulative.cum_max()
+        
+        return ReturnStats(
+            count=series.len(),
+            mean=mean,
+            m2=((series - mean) ** 2).sum(),
+            neg_count=downside.len(),
+            neg_mean=neg_mean,
+            neg_m2=((downside - neg_mean) ** 2).sum(),
+            max_drawdown=((running_max - cumulative) / running_max).max()
+        )
+    
+    def _calculate_sharpe_ratio(self, mean_return: float, std_return: float) -> float:
         """
         Calculate Sharpe ratio.
         
         Args:
-            excess_returns: Series with excess returns
+            mean_return: Mean periodic return
+            std_return: Standard deviation of periodic returns
             
         Returns:
             Sharpe ratio
         """
-        if excess_returns.std() == 0:
+        if std_return == 0:
             return 0.0
         
-        return (excess_returns.mean() * 252) / (excess_returns.std() * np.sqrt(252))
+        return (mean_return * _ANNUAL - self.risk_free_rate) / (std_return * _SQRT_252)
     
-    def _calculate_sortino_ratio(self, returns: pd.Series) -> float:
+    def _calculate_sortino_ratio(self, mean_return: float, downside_std: float) -> float:
         """
         Calculate Sortino ratio.
         
         Args:
-            returns: Series with returns
+            mean_return: Mean periodic return
+            downside_std: Standard deviation of the negative periodic returns
             
         Returns:
             Sortino ratio
         """
-        # Calculate downside returns
-        downside_returns = returns[returns < 0]
-        
-        if len(downside_returns) == 0:
-            return 0.0
-        
         # Calculate downside deviation
-        downside_deviation = downside_returns.std() * np.sqrt(252)
+        downside_deviation = downside_std * _SQRT_252
         
         if downside_deviation == 0:
             return 0.0
         
         # Calculate excess return
-        excess_return = (returns.mean() * 252) - self.risk_free_rate
+        excess_return = mean_return * _ANNUAL - self.risk_free_rate
         
         return excess_return / downside_deviation
     
-    def _calculate_max_drawdown(self, portfolio_values: pd.Series) -> float:
+    def _calculate_max_drawdown(self, returns: np.ndarray) -> float:
         """
         Calculate maximum drawdown.
         
         Args:
-            portfolio_values: Series with portfolio values
+            returns: Array with returns
             
         Returns:
             Maximum drawdown as a percentage
         """
-        # Calculate running maximum
-        running_max = portfolio_values.expanding().max()
+        # Rebuild the growth path and its running peak in single ufunc passes
+        cumulative = np.cumprod(1 + returns)
+        running_max = np.maximum.accumulate(cumulative)
         
         # Calculate drawdown
-        drawdown = (portfolio_values - running_max) / running_max
+        drawdown = (cumulative - running_max) / running_max
         
         # Return maximum drawdown
-        return abs(drawdown.min())
+        return float(abs(drawdown.min()))
     
     def _calculate_calmar_ratio(self, annualized_return: float, max_drawdown: float) -> float:
         """
@@ -166,18 +330,27 @@ class PerformanceAnalyzer:
         
         return annualized_return / max_drawdown
     
-    def _calculate_var(self, returns: pd.Series, confidence_level: float) -> float:
+    def _calculate_var(self, returns: np.ndarray, confidence_level: float) -> float:
         """
         Calculate Value at Risk.
         
         Args:
-            returns: Series with returns
+            returns: Array with returns
             confidence_level: Confidence level (e.g., 0.05 for 95% VaR)
             
         Returns:
             Value at Risk as a percentage
         """
-        return abs(np.percentile(returns, confidence_level * 100))
+        # Linearly interpolated quantile, selecting the two neighbouring
+        # order statistics instead of sorting the whole series
+        position = confidence_level * (returns.size - 1)
+        lower = int(position)
+        upper = min(lower + 1, returns.size - 1)
+        
+        partitioned = np.partition(returns, (lower, upper))
+        quantile = partitioned[lower] + (position - lower) * (partitioned[upper] - partitioned[lower])
+        
+        return float(abs(quantile))
     
     def generate_summary_report(self, results: BacktestResults) -> str:
         """
@@ -4,15 +4,167 @@ Portfolio Backtester
 Main backtesting engine for portfolio analysis.
 """
 
+import hashlib
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from typing import List, Dict, Any
+from pathlib import Path
+from typing import List, Dict, Any, Optional
 import yfinance as yf
 
 from src.strategies import BaseStrategy
-from src.analytics import PerformanceAnalyzer
+from src.analytics import PerformanceAnalyzer, ReturnStats
 from src.utils.results import BacktestResults
+from src.utils.numba_utils import NUMBA_AVAILABLE, njit, prange
+
+
+# Downloaded prices are cached here, one parquet file per request
+_CACHE_DIR = Path("~/.cache/apb").expanduser()
+
+# The cache is stored as parquet, which needs pyarrow
+try:
+    import pyarrow  # noqa: F401
+    _PARQUET_AVAILABLE = True
+except ImportError:
+    _PARQUET_AVAILABLE = False
+
+
+def _run_core_numpy(prices: np.ndarray, weights: np.ndarray, capital: float):
+    """
+    Compute portfolio returns and values in a single fused pass.
+    
+    Args:
+        prices: (T, N) array of asset prices
+        weights: (T, N) array of portfolio weights
+        capital: Initial portfolio value
+        
+    Returns:
+        Tuple of (portfolio returns, portfolio values, return statistics).
+        Returns are float64; values take the dtype of prices. The
+        statistics are None here and left to the analyzer.
+    """
+    # Asset returns, with the first period flat. Returns that are not
+    # finite (missing or zero prices, e.g. a failed ticker) count as flat,
+    # as pandas' NaN-skipping sum does
+    rets = np.empty_like(prices)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rets[1:] = prices[1:] / prices[:-1] - 1.0
+    rets[0] = 0.0
+    rets[~np.isfinite(rets)] = 0.0
+    
+    # Previous period's weights, with no position before the first period
+    w_prev = np.empty_like(weights)
+    w_prev[1:] = weights[:-1]
+    w_prev[0] = 0.0
+    
+    # Weighted row sum
+    port_ret = np.einsum('ij,ij->i', w_prev, rets, dtype=np.float64)
+    
+    values = (capital * np.cumprod(1.0 + port_ret)).astype(prices.dtype, copy=False)
+    
+    return port_ret, values, None
+
+
+@njit(cache=True)
+def _run_core_jit(prices: np.ndarray, weights: np.ndarray, capital: float):
+    """
+    Numba version of `_run_core_numpy`.
+    
+    Accumulates portfolio returns symbol by symbol, so the column-major
+    prices and weights are read contiguously, without materializing the
+    asset return matrix. A second pass over the time axis then carries
+    wealth as a scalar and accumulates the ReturnStats the analyzer needs.
+    
+    Compiled without fastmath: prices may contain NaN, and fastmath lets
+    the compiler assume they never do.
+    """
+    T, N = prices.shape
+    port_ret = np.zeros(T)
+    values = np.empty(T, prices.dtype)
+    
+    for j in range(N):
+        for t in range(1, T):
+            # Missing or zero prices give a flat return, as in the numpy kernel
+            prev = prices[t - 1, j]
+            if prev == 0.0:
+                continue
+            r = prices[t, j] / prev - 1.0
+            if np.isfinite(r):
+                port_ret[t] += weights[t - 1, j] * r
+    
+    wealth = 1.0
+    peak = 1.0
+    max_dd = 0.0
+    
+    # The first period's flat return is part of the series
+    count = 1
+    mean = 0.0
+    m2 = 0.0
+    neg_count = 0
+    neg_mean = 0.0
+    neg_m2 = 0.0
+    
+    values[0] = capital
+    for t in range(1, T):
+        pr = port_ret[t]
+        wealth *= 1.0 + pr
+        values[t] = wealth * capital
+        
+        # Drawdown from the running peak
+        peak = max(peak, wealth)
+        max_dd = max(max_dd, (peak - wealth) / peak)
+        
+        # Welford updates for all and for negative returns
+        count += 1
+        delta = pr - mean
+        mean += delta / count
+        m2 += delta * (pr - mean)
+        if pr < 0.0:
+            neg_count += 1
+            delta = pr - neg_mean
+            neg_mean += delta / neg_count
+            neg_m2 += delta * (pr - neg_mean)
+    
+    stats = ReturnStats(count, mean, m2, neg_count, neg_mean, neg_m2, max_dd)
+    
+    return port_ret, values, stats
+
+
+@njit(parallel=True, cache=True)
+def _run_batch_core(
+    prices: np.ndarray,
+    weights_batch: np.ndarray,
+    capital: float,
+    out_returns: np.ndarray,
+    out_values: np.ndarray,
+    out_stats: np.ndarray
+):
+    """
+    Run `_run_core_jit` for K weight scenarios in parallel.
+    
+    Args:
+        prices: (T, N) array of asset prices
+        weights_batch: (K, T, N) array of portfolio weights per scenario
+        capital: Initial portfolio value
+        out_returns: (K, T) array receiving the portfolio returns
+        out_values: (K, T) array receiving the portfolio values
+        out_stats: (K, 7) array receiving the ReturnStats fields
+    """
+    for k in prange(weights_batch.shape[0]):
+        port_ret, values, stats = _run_core_jit(prices, weights_batch[k], capital)
+        out_returns[k] = port_ret
+        out_values[k] = values
+        out_stats[k, 0] = stats.count
+        out_stats[k, 1] = stats.mean
+        out_stats[k, 2] = stats.m2
+        out_stats[k, 3] = stats.neg_count
+        out_stats[k, 4] = stats.neg_mean
+        out_stats[k, 5] = stats.neg_m2
+        out_stats[k, 6] = stats.max_drawdown
+
+
+# Use the compiled kernel when Numba is installed
+_run_core = _run_core_jit if NUMBA_AVAILABLE else _run_core_numpy
 
 
 class PortfolioBacktester:
@@ -21,6 +173,12 @@ class PortfolioBacktester:
     
     This class handles the core backtesting logic including data fetching,
     strategy execution, and performance calculation.
+    
+    Prices, weights and portfolio values are stored as float32 to halve
+    memory traffic; single precision keeps about 7 significant digits,
+    which is ample for percentage returns. Portfolio returns and all
+    accumulated statistics are computed in float64, and initial_capital
+    is only applied at the final multiply.
     """
     
     def __init__(
@@ -29,7 +187,8 @@ class PortfolioBacktester:
         start_date: str,
         end_date: str,
         initial_capital: float = 100000,
-        rebalance_frequency: str = 'monthly'
+        rebalance_frequency: str = 'monthly',
+        use_cache: bool = True
     ):
         """
         Initialize the portfolio backtester.
@@ -40,12 +199,15 @@ class PortfolioBacktester:
             end_date: End date in YYYY-MM-DD format
             initial_capital: Initial portfolio value
             rebalance_frequency: How often to rebalance ('daily', 'weekly', 'monthly')
+            use_cache: Reuse previously downloaded prices from the local cache
+                (needs pyarrow; ignored without it)
         """
         self.symbols = symbols
         self.start_date = start_date
         self.end_date = end_date
         self.initial_capital = initial_capital
         self.rebalance_frequency = rebalance_frequency
+        self.use_cache = use_cache and _PARQUET_AVAILABLE
         
         self.data = None
         self.portfolio_values = None
@@ -60,67 +222,129 @@ class PortfolioBacktester:
         """
         print(f"📥 Fetching data for {', '.join(self.symbols)}...")
         
-        try:
-            # Download data using yfinance
-            data = yf.download(
-                self.symbols,
-                start=self.start_date,
-                end=self.end_date,
-                progress=False
-            )
-            
-            # Handle single symbol case
-            if len(self.symbols) == 1:
-                data = pd.DataFrame(data['Adj Close'])
-                data.columns = self.symbols
-            else:
-                # For multiple symbols, extract only the Adj Close column
-                if 'Adj Close' in data.columns:
-                    data = data['Adj Close']
+        data = self._read_cache() if self.use_cache else None
+        
+        if data is None:
+            try:
+                # Download adjusted closes for all symbols in one threaded request
+                raw = yf.download(
+                    self.symbols,
+                    start=self.start_date,
+                    end=self.end_date,
+                    progress=False,
+                    auto_adjust=True,
+                    group_by='column',
+                    threads=True
+                )
+                
+                # Select closes by name on the column-grouped frame
+                if isinstance(raw.columns, pd.MultiIndex):
+                    data = raw['Close']
                 else:
-                    # Fallback to Close if Adj Close is not available
-                    data = data['Close']
-            
-            # Forward fill missing values
-            data = data.ffill()
-            
-            print(f"✅ Downloaded {len(data)} days of data")
-            return data
+                    data = raw[['Close']].rename(columns={'Close': self.symbols[0]})
+                
+                # Forward fill missing values, and back fill leading gaps so a
+                # symbol is flat (zero return) until its first quote
+                data = data.ffill().bfill()
+                
+                print(f"✅ Downloaded {len(data)} days of data")
+                
+                if self.use_cache and self._is_cacheable(data):
+                    self._write_cache(data)
+                
+            except Exception as e:
+                print(f"❌ Error fetching data: {e}")
+                # Use sample data for demonstration
+                data = self._generate_sample_data()
+        
+        # Lay prices out column-major so per-symbol operations walk
+        # contiguous memory
+        prices = np.asfortranarray(data.to_numpy(dtype=np.float32))
+        return pd.DataFrame(prices, index=data.index, columns=data.columns, copy=False)
+    
+    def _cache_path(self) -> Path:
+        """Path of the cache file for this symbol set and date range."""
+        request = (sorted(self.symbols), self.start_date, self.end_date)
+        key = hashlib.sha1(repr(request).encode()).hexdigest()[:16]
+        return _CACHE_DIR / f"{key}.parquet"
+    
+    def _is_cacheable(self, data: pd.DataFrame) -> bool:
+        """
+        Check whether downloaded prices are final and complete.
+        
+        Ranges reaching today may still grow, and a symbol without a
+        single quote means its download failed; neither is worth keeping.
+        
+        Args:
+            data: DataFrame with historical prices
             
+        Returns:
+            True if the prices can be cached
+        """
+        if data.empty or data.isna().all().any():
+            return False
+        
+        return pd.Timestamp(self.end_date) < pd.Timestamp.today().normalize()
+    
+    def _read_cache(self) -> Optional[pd.DataFrame]:
+        """
+        Load previously downloaded prices from the cache.
+        
+        Returns:
+            DataFrame with historical prices, or None if not cached
+        """
+        path = self._cache_path()
+        if not path.exists():
+            return None
+        
+        try:
+            data = pd.read_parquet(path)
+        except Exception as e:
+            print(f"⚠️  Ignoring unreadable cache file {path}: {e}")
+            return None
+        
+        print(f"✅ Loaded {len(data)} days of data from cache")
+        return data
+    
+    def _write_cache(self, data: pd.DataFrame):
+        """
+        Store downloaded prices in the cache.
+        
+        Args:
+            data: DataFrame with historical prices
+        """
+        path = self._cache_path()
+        
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            data.to_parquet(path, compression='zstd')
         except Exception as e:
-            print(f"❌ Error fetching data: {e}")
-            # Return sample data for demonstration
-            return self._generate_sample_data()
+            print(f"⚠️  Could not cache data: {e}")
     
     def _generate_sample_data(self) -> pd.DataFrame:
         """Generate sample data for demonstration purposes."""
         print("⚠️  Using sample data for demonstration...")
         
-        # Generate sample dates
+        # Generate sample trading (business) dates
         start = pd.to_datetime(self.start_date)
         end = pd.to_datetime(self.end_date)
-        dates = pd.date_range(start=start, end=end, freq='D')
+        dates = pd.date_range(start=start, end=end, freq='B')
+        
+        n_days = len(dates)
+        n_symbols = len(self.symbols)
         
         # Generate sample prices with some realistic patterns
-        np.random.seed(42)  # For reproducible results
+        rng = np.random.default_rng(42)  # For reproducible results
         
-        data = {}
-        for symbol in self.symbols:
-            # Start with a base price
-            base_price = 100 + np.random.randint(50, 200)
-            
-            # Generate daily returns with some trend and volatility
-            daily_returns = np.random.normal(0.0005, 0.02, len(dates))
-            
-            # Add some trend
-            trend = np.linspace(0, 0.1, len(dates))
-            daily_returns += trend / len(dates)
-            
-            # Calculate cumulative prices
-            prices = base_price * np.exp(np.cumsum(daily_returns))
-            data[symbol] = prices
+        # Generate daily returns for all symbols with some trend and volatility
+        daily_returns = rng.normal(0.0005, 0.02, size=(n_days, n_symbols)).astype(np.float32)
+        daily_returns += (np.linspace(0, 0.1, n_days) / n_days)[:, None]
+        
+        # Calculate cumulative prices from a base price per symbol
+        base_prices = 100 + rng.integers(50, 200, size=n_symbols)
+        prices = base_prices * np.exp(np.cumsum(daily_returns, axis=0))
         
-        return pd.DataFrame(data, index=dates)
+        return pd.DataFrame(prices.astype(np.float32, copy=False), index=dates, columns=self.symbols)
     
     def run(self, strategy: BaseStrategy) -> 'BacktestResults':
         """
@@ -138,92 +362,144 @@ class PortfolioBacktester:
         if self.data is None:
             self.data = self.fetch_data()
         
-        # Generate signals from strategy
-        signals = strategy.generate_signals(self.data)
-        
         # Calculate portfolio weights
-        weights = self._calculate_weights(signals)
-        
-        # Calculate portfolio returns
-        returns = self._calculate_returns(weights)
+        weights = self._strategy_weights(strategy)
         
-        # Calculate portfolio values
-        portfolio_values = self._calculate_portfolio_values(returns)
+        # Calculate portfolio returns and values
+        returns, values, stats = _run_core(
+            self.data.to_numpy(dtype=np.float32),
+            weights.to_numpy(dtype=np.float32),
+            self.initial_capital
+        )
+        portfolio_values = pd.Series(values, index=self.data.index)
         
-        # Store results
+        # Store results; static weights reached the kernel as a read-only
+        # broadcast view, so keep a writable copy
         self.portfolio_values = portfolio_values
-        self.weights_history = weights
+        self.weights_history = weights.copy() if strategy.is_static else weights
         
         # Calculate performance metrics
         analyzer = PerformanceAnalyzer()
         results = analyzer.calculate_metrics(
             portfolio_values=portfolio_values,
             weights=weights,
-            initial_capital=self.initial_capital
+            initial_capital=self.initial_capital,
+            returns=returns,
+            stats=stats
         )
         
         print("✅ Backtest completed!")
         return results
     
-    def _calculate_weights(self, signals: pd.DataFrame) -> pd.DataFrame:
+    def run_batch(self, strategies: List[BaseStrategy]) -> List['BacktestResults']:
         """
-        Calculate portfolio weights based on signals.
+        Run several strategies over the same data in one batched kernel call.
+        
+        Useful for parameter sweeps: with Numba installed the scenarios are
+        spread across cores. Unlike run, this does not store
+        portfolio_values or weights_history.
         
         Args:
-            signals: DataFrame with buy/sell signals
+            strategies: Strategy objects to backtest
             
         Returns:
-            DataFrame with portfolio weights
+            List of BacktestResults, one per strategy
         """
-        # Simple equal weight allocation for now
-        weights = pd.DataFrame(index=signals.index, columns=signals.columns)
+        print(f"🔄 Running {len(strategies)} backtests...")
         
-        for date in signals.index:
-            # Get active positions (where signal > 0)
-            active_positions = signals.loc[date] > 0
+        # Fetch data if not already done
+        if self.data is None:
+            self.data = self.fetch_data()
+        
+        prices = self.data.to_numpy(dtype=np.float32)
+        weights = [self._strategy_weights(strategy) for strategy in strategies]
+        
+        # Keep each scenario's weights column-major, like the prices, so the
+        # kernel reads both contiguously
+        n_days, n_symbols = prices.shape
+        weights_batch = np.empty((len(weights), n_symbols, n_days), dtype=np.float32)
+        weights_batch = weights_batch.transpose(0, 2, 1)
+        for k, w in enumerate(weights):
+            weights_batch[k] = w.to_numpy(dtype=np.float32)
+        
+        # Calculate portfolio returns, values and statistics for all scenarios
+        n_scenarios = len(weights)
+        if NUMBA_AVAILABLE:
+            returns = np.empty((n_scenarios, n_days))
+            values = np.empty((n_scenarios, n_days), dtype=prices.dtype)
+            stats_table = np.empty((n_scenarios, len(ReturnStats._fields)))
+            _run_batch_core(prices, weights_batch, self.initial_capital, returns, values, stats_table)
+            stats = [
+                ReturnStats(int(row[0]), row[1], row[2], int(row[3]), row[4], row[5], row[6])
+                for row in stats_table
+            ]
+        else:
+            runs = [_run_core_numpy(prices, w, self.initial_capital) for w in weights_batch]
+            returns, values, stats = zip(*runs)
+        
+        # Calculate performance metrics
+        analyzer = PerformanceAnalyzer()
+        results = [
+            analyzer.calculate_metrics(
+                portfolio_values=pd.Series(values[k], index=self.data.index),
+                weights=weights[k],
+                initial_capital=self.initial_capital,
+                returns=returns[k],
+                stats=stats[k]
+            )
+            for k in range(n_scenarios)
+        ]
+        
+        print("✅ Backtests completed!")
+        return results
+    
+    def _strategy_weights(self, strategy: BaseStrategy) -> pd.DataFrame:
+        """
+        Calculate portfolio weights for a strategy.
+        
+        Args:
+            strategy: Strategy object to use for the backtest
             
-            if active_positions.sum() > 0:
-                # Equal weight allocation
-                weight = 1.0 / active_positions.sum()
-                weights.loc[date] = active_positions * weight
-            else:
-                # All cash if no positions
-                weights.loc[date] = 0.0
+        Returns:
+            DataFrame with portfolio weights
+        """
+        if strategy.is_static:
+            return self._broadcast_weights(strategy.generate_weights(self.data))
         
-        return weights
+        signals = strategy.generate_signals(self.data)
+        return self._calculate_weights(signals)
     
-    def _calculate_returns(self, weights: pd.DataFrame) -> pd.Series:
+    def _calculate_weights(self, signals: pd.DataFrame) -> pd.DataFrame:
         """
-        Calculate portfolio returns based on weights.
+        Calculate portfolio weights based on signals.
         
         Args:
-            weights: DataFrame with portfolio weights
+            signals: DataFrame with buy/sell signals
             
         Returns:
-            Series with portfolio returns
+            DataFrame with portfolio weights
         """
-        # Calculate asset returns
-        asset_returns = self.data.pct_change()
+        # Equal weight across active positions (signal > 0); all cash if none
+        mask = signals.to_numpy() > 0
+        counts = mask.sum(axis=1, keepdims=True)
         
-        # Calculate portfolio returns
-        portfolio_returns = (weights.shift(1) * asset_returns).sum(axis=1)
+        # Divide straight into a column-major float32 buffer so the frame
+        # wraps a single typed block
+        weights = np.empty(mask.shape, dtype=np.float32, order='F')
+        np.divide(mask, np.maximum(counts, 1), out=weights, dtype=np.float32)
         
-        return portfolio_returns.ffill().fillna(0)
+        return pd.DataFrame(weights, index=signals.index, columns=signals.columns, copy=False)
     
-    def _calculate_portfolio_values(self, returns: pd.Series) -> pd.Series:
+    def _broadcast_weights(self, weights: np.ndarray) -> pd.DataFrame:
         """
-        Calculate portfolio values over time.
+        Expand a static weight vector to every date without copying it.
         
         Args:
-            returns: Series with portfolio returns
+            weights: Array with one weight per symbol
             
         Returns:
-            Series with portfolio values
+            Read-only DataFrame with portfolio weights
         """
-        # Calculate cumulative returns
-        cumulative_returns = (1 + returns).cumprod()
-        
-        # Calculate portfolio values
-        portfolio_values = self.initial_capital * cumulative_returns
+        weights = np.broadcast_to(np.asarray(weights, dtype=np.float32), self.data.shape)
         
-        return portfolio_values 
\ No newline at end of file
+        return pd.DataFrame(weights, index=self.data.index, columns=self.data.columns, copy=False)
@@ -22,7 +22,8 @@ def main():
 
 
 @main.command()
-def sample():
+@click.option('--no-cache', is_flag=True, help='Re-download data instead of using the local cache')
+def sample(no_cache):
     """Run a sample backtest with popular stocks"""
     click.echo("🚀 Running sample backtest...")
     
@@ -38,7 +39,8 @@ def sample():
             symbols=symbols,
             start_date=start_date,
             end_date=end_date,
-            initial_capital=initial_capital
+            initial_capital=initial_capital,
+            use_cache=not no_cache
         )
         
         # Run backtest
@@ -73,7 +75,8 @@ def sample():
 @click.option('--end', required=True, help='End date (YYYY-MM-DD)')
 @click.option('--capital', '-c', default=100000, help='Initial capital')
 @click.option('--output', '-o', help='Output file for results')
-def backtest(symbols, start, end, capital, output):
+@click.option('--no-cache', is_flag=True, help='Re-download data instead of using the local cache')
+def backtest(symbols, start, end, capital, output, no_cache):
     """Run a custom backtest"""
     click.echo(f"🚀 Running backtest for {', '.join(symbols)}...")
     
@@ -83,7 +86,8 @@ def backtest(symbols, start, end, capital, output):
             symbols=list(symbols),
             start_date=start,
             end_date=end,
-            initial_capital=capital
+            initial_capital=capital,
+            use_cache=not no_cache
         )
         
         # Run backtest
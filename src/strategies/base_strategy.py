@@ -5,6 +5,7 @@ Abstract base class for all trading strategies.
 """
 
 from abc import ABC, abstractmethod
+import numpy as np
 import pandas as pd
 from typing import Dict, Any
 
@@ -15,8 +16,14 @@ class BaseStrategy(ABC):
     
     All trading strategies should inherit from this class and implement
     the generate_signals method.
+    
+    Strategies that hold the same allocation on every date can set
+    `is_static = True` and implement generate_weights, which lets the
+    backtester skip building a full signals frame.
     """
     
+    is_static = False
+    
     def __init__(self, **kwargs):
         """
         Initialize the strategy with parameters.
@@ -40,6 +47,18 @@ class BaseStrategy(ABC):
         """
         pass
     
+    def generate_weights(self, data: pd.DataFrame) -> np.ndarray:
+        """
+        Generate the fixed portfolio weights of a static strategy.
+        
+        Args:
+            data: DataFrame with price data (index: dates, columns: symbols)
+            
+        Returns:
+            Array with one weight per symbol, applied on every date
+        """
+        raise NotImplementedError(f"{self.name} does not provide static weights")
+    
     def get_parameters(self) -> Dict[str, Any]:
         """
         Get strategy parameters.
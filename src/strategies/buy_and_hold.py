@@ -17,6 +17,16 @@ class BuyAndHoldStrategy(BaseStrategy):
     throughout the entire backtest period.
     """
     
+    @property
+    def is_static(self) -> bool:
+        """
+        Whether the static 1/N weights describe this strategy.
+        
+        Subclasses that override generate_signals are run from their
+        signals instead.
+        """
+        return type(self).generate_signals is BuyAndHoldStrategy.generate_signals
+    
     def __init__(self, **kwargs):
         """
         Initialize the buy and hold strategy.
@@ -36,13 +46,25 @@ class BuyAndHoldStrategy(BaseStrategy):
         Returns:
             DataFrame with trading signals (1 for all assets on all dates)
         """
-        # Create signals DataFrame with same shape as data
-        signals = pd.DataFrame(index=data.index, columns=data.columns)
+        # All signals are 1 (buy and hold). The backtester uses the static
+        # weights instead, so this only runs for subclasses and direct
+        # callers, who may edit the frame; allocate it writable
+        ones = np.ones(data.shape, dtype=np.float32)
         
-        # Set all signals to 1 (buy and hold)
-        signals = signals.fillna(1)
+        return pd.DataFrame(ones, index=data.index, columns=data.columns, copy=False)
+    
+    def generate_weights(self, data: pd.DataFrame) -> np.ndarray:
+        """
+        Generate buy and hold weights.
         
-        return signals
+        Args:
+            data: DataFrame with price data (index: dates, columns: symbols)
+            
+        Returns:
+            Array with an equal weight for every asset
+        """
+        n_assets = data.shape[1]
+        return np.full(n_assets, 1.0 / n_assets)
     
     def __str__(self) -> str:
         """String representation of the strategy."""
@@ -0,0 +1,51 @@
+"""
+Numba Utilities
+
+Optional Numba support for the performance-critical kernels. When Numba is
+not installed, `njit` becomes a no-op decorator and `prange` falls back to
+`range`, so callers can check `NUMBA_AVAILABLE` and pick a numpy
+implementation instead.
+"""
+
+# Top-level package name the kernels are normally imported under
+_PACKAGE = __name__.partition('.')[0]
+
+try:
+    import numba
+    from numba import prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+
+def njit(*args, **kwargs):
+    """
+    Compile a function with numba.njit, or return it unchanged without Numba.
+    
+    Numba's on-disk cache records the module a kernel was compiled in, so a
+    file imported under a second name (e.g. `backtester.*` with src on
+    sys.path, as the tests and examples do) would write entries that the
+    package proper cannot load. cache=True is therefore only honoured for
+    modules inside this package.
+    """
+    if len(args) == 1 and callable(args[0]) and not kwargs:
+        func, args = args[0], ()
+    else:
+        func = None
+    
+    def decorator(func):
+        if not NUMBA_AVAILABLE:
+            return func
+        
+        options = dict(kwargs)
+        if options.get('cache') and not func.__module__.startswith(_PACKAGE + '.'):
+            options['cache'] = False
+        
+        # Positional arguments (e.g. eager signatures) go to numba unchanged
+        return numba.njit(*args, **options)(func)
+    
+    return decorator if func is None else decorator(func)
+
+
+__all__ = ["NUMBA_AVAILABLE", "njit", "prange"]
@@ -4,28 +4,40 @@ Backtest Results
 Container for backtest results and performance metrics.
 """
 
+from dataclasses import dataclass, asdict
 from typing import Dict, Any
 
 
+@dataclass
 class BacktestResults:
     """Container for backtest results and performance metrics."""
     
-    def __init__(self, **kwargs):
-        """Initialize results with performance metrics."""
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+    # Declared by hand rather than with dataclass(slots=True), which
+    # needs Python 3.10
+    __slots__ = (
+        'final_value',
+        'total_return',
+        'annualized_return',
+        'sharpe_ratio',
+        'max_drawdown',
+        'volatility',
+        'sortino_ratio',
+        'calmar_ratio',
+        'var_95',
+        'weights',
+    )
+    
+    final_value: float
+    total_return: float
+    annualized_return: float
+    sharpe_ratio: float
+    max_drawdown: float
+    volatility: float
+    sortino_ratio: float
+    calmar_ratio: float
+    var_95: float
+    weights: Dict[str, float]
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert results to dictionary."""
-        return {
-            'final_value': self.final_value,
-            'total_return': self.total_return,
-            'annualized_return': self.annualized_return,
-            'sharpe_ratio': self.sharpe_ratio,
-            'max_drawdown': self.max_drawdown,
-            'volatility': self.volatility,
-            'sortino_ratio': getattr(self, 'sortino_ratio', 0.0),
-            'calmar_ratio': getattr(self, 'calmar_ratio', 0.0),
-            'var_95': getattr(self, 'var_95', 0.0),
-            'weights': self.weights
-        } 
\ No newline at end of file
+        return asdict(self)
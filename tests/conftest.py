@@ -0,0 +1,59 @@
+"""
+Test Configuration
+
+Shared pytest configuration for the portfolio backtester test suite.
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Put src on the path for every test module, once per session; the
+# project root is needed too for the package's own src.* imports
+root_path = Path(__file__).resolve().parent.parent
+for path in (str(root_path), str(root_path / 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from analytics import PerformanceAnalyzer
+from backtester import PortfolioBacktester
+from strategies import BaseStrategy, BuyAndHoldStrategy
+from utils.numba_utils import NUMBA_AVAILABLE
+
+
+class _LongAllStrategy(BaseStrategy):
+    """Hold every asset, through signals rather than static weights."""
+    
+    def generate_signals(self, data: pd.DataFrame) -> pd.DataFrame:
+        return data * 0 + 1
+
+
+def pytest_configure(config):
+    """Register custom markers."""
+    config.addinivalue_line(
+        "markers", "slow: large stress tests (deselect with '-m \"not slow\"')"
+    )
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _warm_numba():
+    """Compile the Numba kernels once so tests measure steady state."""
+    if not NUMBA_AVAILABLE:
+        return
+    
+    analyzer = PerformanceAnalyzer(engine="numba")
+    analyzer.calculate_metrics(pd.Series([1.0, 1.01, 1.02]), pd.DataFrame({'X': [1.0] * 3}), 1.0)
+    
+    # A few days of sample data compile the single and batched kernels for
+    # both weight layouts: broadcast static weights and signal-derived ones
+    static = BuyAndHoldStrategy()
+    dynamic = _LongAllStrategy()
+    
+    backtester = PortfolioBacktester(['X', 'Y'], '2020-01-01', '2020-01-10')
+    backtester.data = backtester._generate_sample_data()
+    for strategy in (static, dynamic):
+        backtester.run(strategy)
+    backtester.run_batch([static])
+    backtester.run_batch([static, dynamic])
@@ -6,76 +6,384 @@ Simple tests to verify the installation and basic functionality.
 
 import pytest
 import sys
-from pathlib import Path
+import time
+from dataclasses import fields, is_dataclass
 
-# Add src to path for testing
-sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+# conftest.py puts src on sys.path; pytest loads it before this module,
+# so load it by hand when the file is run directly
+if __name__ == '__main__':
+    import conftest  # noqa: F401
+
+from backtester import PortfolioBacktester, portfolio_backtester
+from strategies import BaseStrategy, BuyAndHoldStrategy
+from analytics import PerformanceAnalyzer, performance_analyzer
+from utils.numba_utils import njit
+
+# Shared calendar for the data fixtures
+N_DAYS = 366
+DATES = pd.date_range('2020-01-01', periods=N_DAYS, freq='D')
+
+
+@pytest.fixture(scope="session")
+def sample_prices():
+    """Linearly rising daily prices for two symbols over 2020."""
+    idx = np.arange(N_DAYS, dtype=np.float64)
+    arr = np.empty((N_DAYS, 2), dtype=np.float64)
+    arr[:, 0] = 100.0 + 0.1 * idx
+    arr[:, 1] = 200.0 + 0.2 * idx
+    return pd.DataFrame(arr, columns=['AAPL', 'GOOGL'], index=DATES, copy=False)
+
+
+@pytest.fixture(scope="session")
+def sample_portfolio():
+    """Rising, oscillating portfolio values with a static 50/50 allocation."""
+    # The sine term gives the series real drawdowns
+    idx = np.arange(N_DAYS, dtype=np.float64)
+    vals = 100000.0 + 100.0 * idx + 5000.0 * np.sin(idx / 20.0)
+    portfolio_values = pd.Series(vals, index=DATES, copy=False)
+    w = np.full((N_DAYS, 2), 0.5, dtype=np.float64)
+    weights = pd.DataFrame(w, columns=['AAPL', 'GOOGL'], index=DATES, copy=False)
+    return portfolio_values, weights
 
 
 def test_imports():
     """Test that all modules can be imported."""
-    try:
-        from backtester import PortfolioBacktester
-        from strategies import BaseStrategy, BuyAndHoldStrategy
-        from analytics import PerformanceAnalyzer
-        assert True
-    except ImportError as e:
-        pytest.fail(f"Import failed: {e}")
+    assert PortfolioBacktester is not None
 
 
-def test_buy_and_hold_strategy():
+def test_buy_and_hold_strategy(sample_prices):
     """Test the buy and hold strategy."""
-    from strategies import BuyAndHoldStrategy
-    import pandas as pd
-    
-    # Create sample data
-    dates = pd.date_range('2020-01-01', '2020-12-31', freq='D')
-    data = pd.DataFrame({
-        'AAPL': [100 + i * 0.1 for i in range(len(dates))],
-        'GOOGL': [200 + i * 0.2 for i in range(len(dates))]
-    }, index=dates)
+    data = sample_prices
     
     # Test strategy
     strategy = BuyAndHoldStrategy()
     signals = strategy.generate_signals(data)
     
     # Check that all signals are 1 (buy and hold)
-    assert (signals == 1).all().all()
-    assert signals.shape == data.shape
+    arr = signals.to_numpy()
+    assert arr.shape == data.shape
+    assert arr.min() == 1 and arr.max() == 1
+    
+    # Subclasses edit the signals they get from super()
+    signals.iloc[0, 0] = 0
+    
+    # Stored weights stay writable after the static fast path
+    backtester = PortfolioBacktester(['AAPL', 'GOOGL'], '2020-01-01', '2020-12-31')
+    backtester.data = data
+    backtester.run(strategy)
+    backtester.weights_history.iloc[0, 0] = 0.0
 
 
-def test_performance_analyzer():
-    """Test the performance analyzer."""
-    from analytics import PerformanceAnalyzer
-    import pandas as pd
-    import numpy as np
-    
-    # Create sample data
-    dates = pd.date_range('2020-01-01', '2020-12-31', freq='D')
-    portfolio_values = pd.Series(
-        [100000 + i * 100 for i in range(len(dates))],
-        index=dates
+def test_buy_and_hold_subclass(sample_prices):
+    """Test that overriding generate_signals disables the static weights."""
+    class FirstAssetStrategy(BuyAndHoldStrategy):
+        def generate_signals(self, data):
+            signals = data * 0
+            signals.iloc[:, 0] = 1
+            return signals
+
+    assert BuyAndHoldStrategy().is_static
+    assert not FirstAssetStrategy().is_static
+
+    backtester = PortfolioBacktester(['AAPL', 'GOOGL'], '2020-01-01', '2020-12-31')
+    backtester.data = sample_prices
+    backtester.run(FirstAssetStrategy())
+
+    np.testing.assert_array_equal(backtester.weights_history.to_numpy()[-1], [1.0, 0.0])
+
+
+def test_calculate_weights():
+    """Test equal weighting across active positions."""
+    signals = pd.DataFrame(
+        [[1, 0, 1], [0, 0, 0], [1, 1, 1], [-1, 1, 0]],
+        columns=['AAPL', 'GOOGL', 'MSFT']
     )
-    
-    weights = pd.DataFrame({
-        'AAPL': [0.5] * len(dates),
-        'GOOGL': [0.5] * len(dates)
-    }, index=dates)
+
+    backtester = PortfolioBacktester(['AAPL', 'GOOGL', 'MSFT'], '2020-01-01', '2020-12-31')
+    weights = backtester._calculate_weights(signals)
+
+    expected = np.array([
+        [0.5, 0.0, 0.5],
+        [0.0, 0.0, 0.0],
+        [1 / 3, 1 / 3, 1 / 3],
+        [0.0, 1.0, 0.0],
+    ])
+    np.testing.assert_allclose(weights.to_numpy(), expected, rtol=1e-6)
+    assert list(weights.columns) == list(signals.columns)
+    assert (weights.dtypes == np.float32).all()
+
+
+def test_fetch_data_layout(monkeypatch):
+    """Test that fetched prices are stored column-major."""
+    def fail_download(*args, **kwargs):
+        raise ConnectionError("offline")
+
+    # Force the sample data fallback so the test does not hit the network
+    monkeypatch.setattr(yf, 'download', fail_download)
+
+    backtester = PortfolioBacktester(
+        ['AAPL', 'GOOGL'], '2020-01-01', '2020-12-31', use_cache=False
+    )
+    data = backtester.fetch_data()
+
+    assert data.to_numpy().flags.f_contiguous
+    assert list(data.columns) == ['AAPL', 'GOOGL']
+
+
+def test_fetch_data_cache(monkeypatch, tmp_path):
+    """Test that downloads are cached and reused."""
+    pytest.importorskip('pyarrow')
+
+    dates = pd.date_range('2020-01-01', periods=5, freq='B')
+    columns = pd.MultiIndex.from_product([['Close'], ['AAPL', 'GOOGL']])
+    calls = []
+
+    def fake_download(*args, **kwargs):
+        calls.append(args)
+        return pd.DataFrame(np.arange(10, dtype=np.float64).reshape(5, 2) + 100,
+                            index=dates, columns=columns)
+
+    monkeypatch.setattr(yf, 'download', fake_download)
+    monkeypatch.setattr(portfolio_backtester, '_CACHE_DIR', tmp_path)
+
+    first = PortfolioBacktester(['AAPL', 'GOOGL'], '2020-01-01', '2020-01-08').fetch_data()
+    second = PortfolioBacktester(['GOOGL', 'AAPL'], '2020-01-01', '2020-01-08').fetch_data()
+
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(first, second, check_freq=False)
+
+
+@pytest.mark.parametrize('case', ['failed_ticker', 'open_range', 'no_pyarrow'])
+def test_fetch_data_not_cached(monkeypatch, tmp_path, case):
+    """Test that incomplete or unfinished downloads are not cached."""
+    dates = pd.date_range('2020-01-01', periods=5, freq='B')
+    columns = pd.MultiIndex.from_product([['Close'], ['AAPL', 'GOOGL']])
+    prices = np.arange(10, dtype=np.float64).reshape(5, 2) + 100
+    end_date = '2020-01-08'
+    if case == 'failed_ticker':
+        prices[:, 1] = np.nan
+    elif case == 'open_range':
+        end_date = (pd.Timestamp.today() + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+    else:
+        monkeypatch.setattr(portfolio_backtester, '_PARQUET_AVAILABLE', False)
+
+    def fake_download(*args, **kwargs):
+        return pd.DataFrame(prices, index=dates, columns=columns)
+
+    monkeypatch.setattr(yf, 'download', fake_download)
+    monkeypatch.setattr(portfolio_backtester, '_CACHE_DIR', tmp_path)
+
+    PortfolioBacktester(['AAPL', 'GOOGL'], '2020-01-01', end_date).fetch_data()
+
+    assert not any(tmp_path.iterdir())
+
+
+@pytest.mark.parametrize('kernel', ['_run_core_numpy', '_run_core_jit'])
+def test_run_failed_ticker(monkeypatch, kernel):
+    """Test that a ticker without quotes does not poison the backtest."""
+    rng = np.random.default_rng(1)
+    dates = pd.date_range('2020-01-01', periods=60, freq='B')
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (60, 3)), axis=0))
+    prices[:, 2] = np.nan
+    columns = pd.MultiIndex.from_product([['Close'], ['A', 'B', 'BAD']])
+
+    # yfinance returns an all-NaN column for a failed ticker without raising
+    def fake_download(*args, **kwargs):
+        return pd.DataFrame(prices, index=dates, columns=columns)
+
+    monkeypatch.setattr(yf, 'download', fake_download)
+    monkeypatch.setattr(portfolio_backtester, '_run_core', getattr(portfolio_backtester, kernel))
+
+    backtester = PortfolioBacktester(
+        ['A', 'B', 'BAD'], '2020-01-01', '2020-03-31', use_cache=False
+    )
+    results = backtester.run(BuyAndHoldStrategy())
+
+    # Pandas formulation, which skips the missing returns in the sum
+    data = backtester.data.astype(np.float64)
+    weights = pd.DataFrame(1 / 3, index=data.index, columns=data.columns)
+    expected_returns = (weights.shift(1) * data.pct_change()).sum(axis=1)
+    expected_final = 100000 * (1 + expected_returns).prod()
+
+    np.testing.assert_allclose(results.final_value, expected_final, rtol=1e-5)
+    assert np.isfinite(results.sharpe_ratio)
+    assert np.isfinite(results.max_drawdown)
+
+
+@pytest.mark.parametrize('missing', [False, True])
+@pytest.mark.parametrize('kernel', ['_run_core_numpy', '_run_core_jit'])
+def test_run_core(kernel, missing):
+    """Test the fused backtest kernels against the pandas formulation."""
+    rng = np.random.default_rng(0)
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (50, 3)), axis=0)))
+    weights = pd.DataFrame(rng.dirichlet(np.ones(3), size=50))
+    if missing:
+        # A ticker without quotes and a gap in another one
+        prices[2] = np.nan
+        prices.iloc[10:13, 0] = np.nan
+
+    _run_core = getattr(portfolio_backtester, kernel)
+    returns, values, stats = _run_core(prices.to_numpy(), weights.to_numpy(), 1000.0)
+
+    expected_returns = (weights.shift(1) * prices.pct_change()).sum(axis=1)
+    expected_values = 1000.0 * (1 + expected_returns).cumprod()
+    np.testing.assert_allclose(returns, expected_returns.to_numpy(), rtol=1e-12)
+    np.testing.assert_allclose(values, expected_values.to_numpy(), rtol=1e-12)
+
+    # Statistics accumulated in the loop must match the analyzer's own
+    if stats is not None:
+        expected_stats = PerformanceAnalyzer()._calculate_return_stats(
+            expected_returns.to_numpy()
+        )
+        np.testing.assert_allclose(stats, expected_stats, rtol=1e-10)
+
+
+def test_njit_signature():
+    """Test that the njit shim passes eager signatures on to Numba."""
+    pytest.importorskip('numba')
+
+    @njit('float64(float64[:])', cache=True)
+    def total(x):
+        return x.sum()
+
+    assert len(total.signatures) == 1
+    assert total(np.arange(4.0)) == 6.0
+
+
+def test_run_batch():
+    """Test that batched backtests match individual runs."""
+    class FirstAssetStrategy(BaseStrategy):
+        def generate_signals(self, data):
+            signals = data * 0
+            signals.iloc[:, 0] = 1
+            return signals
+
+    strategies = [BuyAndHoldStrategy(), FirstAssetStrategy()]
+
+    backtester = PortfolioBacktester(['AAPL', 'GOOGL', 'MSFT'], '2020-01-01', '2021-12-31')
+    backtester.data = backtester._generate_sample_data()
+
+    batch_results = backtester.run_batch(strategies)
+
+    assert len(batch_results) == len(strategies)
+    for strategy, batch in zip(strategies, batch_results):
+        single = backtester.run(strategy)
+        for key, value in single.to_dict().items():
+            if key == 'weights':
+                assert batch.weights == value
+            else:
+                np.testing.assert_allclose(getattr(batch, key), value, rtol=1e-10)
+
+
+@pytest.mark.parametrize("engine", ["numpy", "numba", "polars"])
+def test_performance_analyzer(sample_portfolio, engine):
+    """Test the performance analyzer."""
+    if engine != "numpy":
+        pytest.importorskip(engine)
+    portfolio_values, weights = sample_portfolio
     
     # Test analyzer
+    analyzer = PerformanceAnalyzer(engine=engine)
+    results = analyzer.calculate_metrics(portfolio_values, weights, 100000)
+    
+    # Check the result schema; BacktestResults must stay a slotted dataclass
+    assert is_dataclass(results), "BacktestResults must be a @dataclass with __slots__"
+    assert not hasattr(results, '__dict__'), "BacktestResults must declare __slots__"
+    names = {f.name for f in fields(results)}
+    assert {'total_return', 'sharpe_ratio', 'max_drawdown', 'weights'} <= names
+    
+    # Maximum drawdown against the running-peak formulation
+    returns = portfolio_values.pct_change().dropna().to_numpy()
+    V = np.cumprod(1 + returns)
+    expected_mdd = float((1 - V / np.maximum.accumulate(V)).max())
+    assert expected_mdd > 0.01
+    np.testing.assert_allclose(results.max_drawdown, expected_mdd, rtol=1e-10)
+    
+    # Annualized Sharpe ratio in closed form; the analyzer counts the
+    # first period as a flat return and subtracts its risk-free rate
+    r = np.concatenate(([0.0], returns))
+    mu = r.mean() - analyzer.risk_free_rate / 252
+    sigma = r.std(ddof=1)
+    expected_sharpe = mu / sigma * np.sqrt(252)
+    np.testing.assert_allclose(results.sharpe_ratio, expected_sharpe, rtol=1e-8)
+    
+    # Accelerated engines must agree with the numpy reference
+    reference = PerformanceAnalyzer().calculate_metrics(portfolio_values, weights, 100000)
+    for key, value in reference.to_dict().items():
+        if key != 'weights':
+            np.testing.assert_allclose(getattr(results, key), value, rtol=1e-12)
+
+
+@pytest.mark.parametrize("engine", ["numba", "polars"])
+def test_return_stats_first_return(engine):
+    """Test that the engines agree when the first return is not flat."""
+    pytest.importorskip(engine)
+    returns = np.array([-0.05, 0.01, 0.02, -0.01, 0.03])
+    
+    # The running peak starts at the first wealth value
+    stats = PerformanceAnalyzer(engine=engine)._calculate_return_stats(returns)
+    reference = PerformanceAnalyzer()._calculate_return_stats(returns)
+    np.testing.assert_allclose(stats.max_drawdown, 0.01, rtol=1e-12)
+    np.testing.assert_allclose(stats, reference, rtol=1e-12)
+
+
+@pytest.mark.parametrize("engine", ["numba", "polars"])
+def test_analyzer_engine_missing(monkeypatch, engine):
+    """Test that an engine without its library fails at construction."""
+    monkeypatch.setattr(performance_analyzer, "NUMBA_AVAILABLE", False)
+    monkeypatch.setattr(performance_analyzer, "_POLARS_AVAILABLE", False)
+    
+    with pytest.raises(ImportError):
+        PerformanceAnalyzer(engine=engine)
+
+
+def test_performance_analyzer_polars(sample_portfolio):
+    """Test that polars inputs give the same metrics as pandas inputs."""
+    pl = pytest.importorskip("polars")
+    portfolio_values, weights = sample_portfolio
+    
+    pv_pl = pl.Series("pv", portfolio_values.to_numpy())
+    w_pl = pl.DataFrame({col: weights[col].to_numpy() for col in weights.columns})
+    
     analyzer = PerformanceAnalyzer()
     results = analyzer.calculate_metrics(portfolio_values, weights, 100000)
+    results_pl = analyzer.calculate_metrics(pv_pl, w_pl, 100000)
+    
+    np.testing.assert_allclose(results_pl.sharpe_ratio, results.sharpe_ratio, rtol=1e-10)
+    for key, value in results.to_dict().items():
+        if key == 'weights':
+            assert results_pl.weights == value
+        else:
+            np.testing.assert_allclose(getattr(results_pl, key), value, rtol=1e-10)
+
+
+@pytest.mark.slow
+def test_analyzer_large():
+    """Test that the analyzer stays fast on 10 years of 500 symbols."""
+    T = 252 * 10
+    N = 500
+    dates = pd.date_range('2010-01-01', periods=T, freq='B')
+    symbols = [f'SYM{i}' for i in range(N)]
+    
+    # Broadcast prices for all symbols in one step
+    idx = np.arange(T, dtype=np.float64)
+    prices = 100 + 0.01 * idx[:, None] + 0.001 * np.arange(N)
+    weights = pd.DataFrame(np.full((T, N), 1.0 / N), index=dates, columns=symbols, copy=False)
+    portfolio_values = pd.Series(1000.0 * prices.mean(axis=1), index=dates)
+    
+    analyzer = PerformanceAnalyzer()
+    t0 = time.perf_counter()
+    results = analyzer.calculate_metrics(portfolio_values, weights, portfolio_values.iloc[0])
+    assert time.perf_counter() - t0 < 1.0
     
-    # Check that results have expected attributes
-    assert hasattr(results, 'total_return')
-    assert hasattr(results, 'sharpe_ratio')
-    assert hasattr(results, 'max_drawdown')
-    assert hasattr(results, 'weights')
+    assert len(results.weights) == N
+    assert results.total_return > 0
 
 
 if __name__ == '__main__':
-    # Run basic tests
-    test_imports()
-    test_buy_and_hold_strategy()
-    test_performance_analyzer()
-    print("✅ All basic tests passed!") 
\ No newline at end of file
+    # Run through pytest so fixtures and conftest hooks apply
+    sys.exit(pytest.main([__file__, '-x', '-q']))